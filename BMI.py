@@ -1,16 +1,19 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
+from tkinter import font as tkfont
 import json
+import bisect
+import functools
+import types
 import os
+import queue
+import re
 from datetime import datetime
 import random 
+import threading
 
-# --- Matplotlib Imports for Data Visualization ---
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import numpy as np 
-from PIL import Image, ImageTk
+# Matplotlib, NumPy and Pillow are imported lazily where they are used
+# (dashboard and diet plan windows) to keep application startup fast.
 
 # --- Constants (Updated Colors) ---
 WINDOW_WIDTH = 400
@@ -22,12 +25,27 @@ HEADER_FG = 'white'
 BUTTON_COLOR = '#87cefa' # Light Sky Blue for the main button
 HISTORY_FILE = 'bmi_history.json'
 ANIMATION_SPEED = 50 # ms for animation refresh
+IO_POLL_INTERVAL = 100 # ms between checks for finished history writes
 ENTRY_BG = 'white'
 ENTRY_FOCUS_COLOR = '#e9f7ff' # Light blue on focus
 
 # Define Dark Pink for Underweight status
 DARK_PINK = '#e60073' 
 
+# BMI classification table: lower bounds of each category after Underweight,
+# and the matching (category, color, advice) for every band.
+_BMI_CUTS = (18.5, 25.0, 30.0)
+_BMI_INFO = (
+    ("Underweight", DARK_PINK, "Focus on a nutrient-rich diet to gain weight safely."),
+    ("Normal Weight", "#28a745", "Maintain your current healthy habits. Excellent!"), # Green
+    ("Overweight", "#fd7e14", "Consider consulting a doctor or dietitian to manage weight."), # Orange
+    ("Obese", "#dc3545", "It is highly recommended to seek professional health guidance immediately."), # Red
+)
+
+# Keystroke validation patterns (empty input is allowed while typing)
+_FLOAT_RE = re.compile(r'\d*\.?\d*\Z')
+_INT_RE = re.compile(r'\d*\Z')
+
 # --- Core Logic ---
 def calculate_bmi(weight_kg, height_cm):
     """
@@ -40,7 +58,7 @@ def calculate_bmi(weight_kg, height_cm):
     # Convert height from cm to meters
     height_m = height_cm / 100
     
-    bmi = weight_kg / (height_m ** 2)
+    bmi = weight_kg / (height_m * height_m)
     return round(bmi, 2)
 
 def calculate_bmr(weight_kg, height_cm, age_years, gender):
@@ -61,95 +79,131 @@ def calculate_bmr(weight_kg, height_cm, age_years, gender):
         
     return round(bmr)
 
+def _ideal_weight_range(height_m2):
+    """Returns the weight range for BMI 18.5 to 24.9 given height (m) squared."""
+    # Target BMI 18.5 (low end of normal) to 24.9 (high end of normal)
+    return round(18.5 * height_m2, 1), round(24.9 * height_m2, 1)
+
 def calculate_ideal_weight_range(height_cm):
     """
     Calculates the ideal weight range based on BMI range 18.5 to 24.9.
     """
     height_m = height_cm / 100
-    
-    # Target BMI 18.5 (low end of normal)
-    low_weight = 18.5 * (height_m ** 2)
-    
-    # Target BMI 24.9 (high end of normal)
-    high_weight = 24.9 * (height_m ** 2)
-    
-    return round(low_weight, 1), round(high_weight, 1)
+    return _ideal_weight_range(height_m * height_m)
 
+def compute_all_metrics(weight_kg, height_cm, age_years, gender):
+    """
+    Calculates BMI, BMR and the ideal weight range in one pass,
+    converting and squaring the height only once.
+    Returns (bmi, bmr, (low_weight, high_weight)).
+    """
+    if height_cm <= 0 or weight_kg <= 0:
+        raise ValueError("Weight and height must be positive values.")
+
+    height_m = height_cm / 100
+    height_m2 = height_m * height_m
+
+    bmi = round(weight_kg / height_m2, 2)
+    bmr = calculate_bmr(weight_kg, height_cm, age_years, gender)
+    return bmi, bmr, _ideal_weight_range(height_m2)
+
+def classify_batch(bmi):
+    """
+    Classifies an array of BMI values at once (the vectorized get_bmi_classification).
+    Returns an array of indices into _BMI_INFO (0 = Underweight ... 3 = Obese).
+    """
+    import numpy as np
+
+    return np.searchsorted(_BMI_CUTS, np.asarray(bmi, dtype=np.float64), side='right')
+
+@functools.lru_cache(maxsize=1024)
 def get_bmi_classification(bmi):
     """
     Classifies the BMI and provides associated advice.
     The Underweight color has been updated to DARK_PINK.
     """
-    if bmi < 18.5:
-        category = "Underweight"
-        color = DARK_PINK # Changed from Yellow to Dark Pink
-        advice = "Focus on a nutrient-rich diet to gain weight safely."
-    elif 18.5 <= bmi <= 24.9:
-        category = "Normal Weight"
-        color = "#28a745" # Green
-        advice = "Maintain your current healthy habits. Excellent!"
-    elif 25.0 <= bmi <= 29.9:
-        category = "Overweight"
-        color = "#fd7e14" # Orange
-        advice = "Consider consulting a doctor or dietitian to manage weight."
-    else: # bmi >= 30.0
-        category = "Obese"
-        color = "#dc3545" # Red
-        advice = "It is highly recommended to seek professional health guidance immediately."
-        
-    return category, color, advice
+    return _BMI_INFO[bisect.bisect_right(_BMI_CUTS, bmi)]
 
+@functools.lru_cache(maxsize=64)
 def generate_diet_plan(category, bmr, age):
     """
     Generates a basic diet plan and caloric goal based on BMI category and BMR.
+    The result is cached, so it is returned as a read-only mapping.
     """
     daily_goal_kcal = bmr
     plan_title = ""
     diet_focus = ""
     macro_split = "Protein: 25%, Carbs: 45%, Fats: 30%"
-    meal_suggestions = []
+    meal_suggestions = ()
 
     if category in ["Overweight", "Obese"]:
         daily_goal_kcal = max(1200, bmr - 500) 
         plan_title = f"Weight Management Plan ({category})"
         diet_focus = f"Your primary goal is to safely achieve a sustainable calorie deficit to promote weight loss. We estimate your daily goal to be **{daily_goal_kcal} kcal**."
-        meal_suggestions = [
+        meal_suggestions = (
             "Prioritize lean proteins (chicken breast, fish, tofu) and high-fiber foods.",
             "Choose complex carbohydrates (oats, brown rice, whole wheat) over simple sugars.",
             "Focus on large portions of non-starchy vegetables at every meal.",
             "Drink plenty of water (2-3 liters) and limit sugary drinks."
-        ]
+        )
     elif category == "Underweight":
         daily_goal_kcal = bmr + 300 
         plan_title = f"Healthy Weight Gain Plan ({category})"
         diet_focus = f"Your goal is to increase caloric intake safely and nutrient-densely to reach a healthy weight. We estimate your daily goal to be **{daily_goal_kcal} kcal**."
-        meal_suggestions = [
+        meal_suggestions = (
             "Eat 5-6 smaller, frequent meals throughout the day.",
             "Incorporate healthy fats (nuts, seeds, avocado, olive oil) and starches (potatoes, sweet potatoes).",
             "Focus on protein and complex carbs post-workout to support muscle and mass gain.",
             "Use full-fat dairy or dairy alternatives for extra calories."
-        ]
+        )
     else: # Normal Weight
         daily_goal_kcal = bmr + 200
         plan_title = f"Maintenance & Wellness Plan ({category})"
         diet_focus = f"Continue your balanced eating habits to maintain your healthy weight. We estimate your daily goal to be around **{daily_goal_kcal} kcal**."
-        meal_suggestions = [
+        meal_suggestions = (
             "Maintain diversity: eat a wide range of colorful fruits and vegetables.",
             "Balance protein, fats, and carbs in every meal.",
             "Limit processed snacks and excessive alcohol.",
             "Stay consistent with portion sizes based on your activity level."
-        ]
+        )
     
     if age >= 50:
         macro_split = "Protein: 30%, Carbs: 40%, Fats: 30% (Higher protein supports muscle mass retention)"
 
-    return {
+    return types.MappingProxyType({
         'title': plan_title,
         'goal_kcal': daily_goal_kcal,
         'focus': diet_focus,
         'macros': macro_split,
         'suggestions': meal_suggestions
-    }
+    })
+
+
+def _parse_history_lines(text):
+    """
+    Parses JSON Lines history text, skipping (and reporting) malformed lines
+    such as a partial append left behind by a crash.
+    Returns (entries, number of malformed lines).
+    """
+    history = []
+    malformed = 0
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            history.append(json.loads(line))
+        except json.JSONDecodeError:
+            print(f"Skipping malformed history line {line_no}: {line!r}")
+            malformed += 1
+    return history, malformed
+
+def _serialize_entry(entry):
+    """
+    Serializes a history entry as a single JSON Lines record.
+    Cached keys (prefixed with '_') are not persisted.
+    """
+    public = {k: v for k, v in entry.items() if not k.startswith('_')}
+    return json.dumps(public, separators=(',', ':')) + '\n'
 
 
 # --- GUI Application Class ---
@@ -161,6 +215,27 @@ class BMICalculatorApp:
         self.root.resizable(False, False)
         self.root.config(bg=CANVAS_BG) 
 
+        # Shared font objects, so widgets don't each resolve their own font
+        self._fonts = {
+            'footnote': tkfont.Font(family='Arial', size=8, slant='italic'),
+            'small': tkfont.Font(family='Arial', size=9),
+            'body': tkfont.Font(family='Arial', size=10),
+            'body_bold': tkfont.Font(family='Arial', size=10, weight='bold'),
+            'body_italic': tkfont.Font(family='Arial', size=10, slant='italic'),
+            'section': tkfont.Font(family='Arial', size=11, weight='bold'),
+            'label': tkfont.Font(family='Arial', size=12),
+            'label_bold': tkfont.Font(family='Arial', size=12, weight='bold'),
+            'category': tkfont.Font(family='Arial', size=14),
+            'title': tkfont.Font(family='Arial', size=14, weight='bold'),
+            'heading': tkfont.Font(family='Arial', size=16, weight='bold'),
+            'display': tkfont.Font(family='Arial', size=24, weight='bold'),
+        }
+
+        # Table styling for the history Treeview (rows and headings)
+        self._style = ttk.Style(self.root)
+        self._style.configure("Treeview", font=self._fonts['small'])
+        self._style.configure("Treeview.Heading", font=self._fonts['body_bold'])
+
         # Tkinter Variables
         self.name_var = tk.StringVar()
         self.age_var = tk.StringVar()
@@ -173,31 +248,161 @@ class BMICalculatorApp:
         # Animation Variables
         self.animation_y = 0
 
+        # History file writes are queued to a background thread so disk latency
+        # never stalls the Tk main loop; self.history itself stays main-thread only.
+        # The worker never touches Tk: results come back on _io_results, which the
+        # main thread polls while writes are pending.
+        self._io_q = queue.Queue()
+        self._io_results = queue.Queue()
+        self._pending_writes = 0
+        threading.Thread(target=self._io_worker, daemon=True).start()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
         self.history = self._load_history() 
         self.workout_image = None # To hold the reference to the workout image
+        self._workout_missing = False # Set once workout.png is known to be absent
+        self._bmi_plot = None # Cached (figure, axes, line) for the trend graph
         self._setup_ui()
         self._animate_background() 
 
     # --- Data Loading/Saving Methods ---
     def _load_history(self):
-        """Loads BMI history from a JSON file."""
+        """
+        Loads BMI history from a JSON Lines file (one entry per line).
+        A legacy file holding a single JSON list is migrated to JSON Lines in place.
+        """
+        history = []
         if os.path.exists(HISTORY_FILE) and os.path.getsize(HISTORY_FILE) > 0:
             try:
                 with open(HISTORY_FILE, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return []
-        return []
+                    content = f.read()
+            except IOError:
+                content = ''
+
+            # The file is rewritten (with validated entries only) to migrate a legacy
+            # list, or to drop malformed lines such as a partial append after a crash,
+            # so they aren't reported again on every load.
+            rewrite = False
+            stripped = content.lstrip()
+            if stripped.startswith('['):
+                # Legacy list, possibly followed by lines appended before migration succeeded
+                try:
+                    history, end = json.JSONDecoder().raw_decode(stripped)
+                except json.JSONDecodeError:
+                    # Leave a damaged legacy file untouched rather than overwrite it
+                    print(f"Could not read legacy history list in {HISTORY_FILE}; leaving the file unchanged.")
+                    history = []
+                else:
+                    extra, _ = _parse_history_lines(stripped[end:])
+                    history.extend(extra)
+                    rewrite = True
+            else:
+                history, malformed = _parse_history_lines(content)
+                rewrite = malformed > 0 or not content.endswith('\n')
+            # Parse each date once here so the trend plot doesn't re-run strptime,
+            # and check the BMI the dashboard columns are built from.
+            # Entries that can't be parsed are skipped rather than failing the whole load.
+            valid = []
+            for entry in history:
+                try:
+                    entry['_date_obj'] = datetime.strptime(entry['date'][:10], "%Y-%m-%d")
+                    float(entry['bmi'])
+                except (KeyError, TypeError, ValueError):
+                    print(f"Skipping invalid history entry: {entry!r}")
+                    continue
+                valid.append(entry)
+            history = valid
+            if rewrite:
+                try:
+                    self._write_history(history)
+                except IOError:
+                    pass # Keep the parsed history; the rewrite is retried on the next load
+        # Remember the file's mtime so view_history only reloads after external edits
+        self._history_mtime = self._history_file_mtime()
+        self._columns_stale = True
+        return history
+
+    def _history_file_mtime(self):
+        """Returns the history file's modification time, or 0.0 if it doesn't exist."""
+        try:
+            return os.path.getmtime(HISTORY_FILE)
+        except OSError:
+            return 0.0
+
+    def _write_history(self, history):
+        """
+        Rewrites the whole history file as JSON Lines (used for migration and repair).
+        The new contents go to a temporary file that replaces the original, so a
+        failed write never leaves the history half-rewritten.
+        """
+        tmp_file = HISTORY_FILE + '.tmp'
+        with open(tmp_file, 'w') as f:
+            for entry in history:
+                f.write(_serialize_entry(entry))
+        os.replace(tmp_file, HISTORY_FILE)
 
     def _save_history(self, entry):
-        """Saves a new BMI entry to the history list and JSON file."""
+        """Saves a new BMI entry to the history list and appends it to the JSON Lines file."""
+        entry['_date_obj'] = datetime.strptime(entry['date'][:10], "%Y-%m-%d")
         self.history.append(entry)
-        try:
-            with open(HISTORY_FILE, 'w') as f:
-                json.dump(self.history, f, indent=4)
-        except IOError:
-            messagebox.showerror("File Error", "Could not save BMI history to file.")
+        self._columns_stale = True
+        self._queue_write('save', _serialize_entry(entry))
+
+    def _queue_write(self, op, payload, on_done=None):
+        """
+        Queues a history file write for the background worker.
+        on_done(error) is called on the main thread once the write has finished;
+        without it, errors are reported in a message box.
+        """
+        if self._pending_writes == 0:
+            self.root.after(IO_POLL_INTERVAL, self._poll_io_results)
+        self._pending_writes += 1
+        self._io_q.put((op, payload, on_done))
+
+    def _io_worker(self):
+        """Applies queued history file writes in order, off the Tk main thread."""
+        while True:
+            op, payload, on_done = self._io_q.get()
+            error = None
+            try:
+                if op == 'save':
+                    with open(HISTORY_FILE, 'a') as f:
+                        f.write(payload)
+                elif op == 'clear':
+                    open(HISTORY_FILE, 'w').close()
+            except IOError:
+                if op == 'save':
+                    error = "Could not save BMI history to file."
+                else:
+                    error = "Could not clear BMI history file."
+            self._io_results.put((on_done, error, self._history_file_mtime()))
+            self._io_q.task_done()
+
+    def _poll_io_results(self):
+        """Handles finished history writes on the main thread."""
+        finished = []
+        while True:
+            try:
+                finished.append(self._io_results.get_nowait())
+            except queue.Empty:
+                break
+        self._pending_writes -= len(finished)
+        if self._pending_writes:
+            self.root.after(IO_POLL_INTERVAL, self._poll_io_results)
+
+        for on_done, error, mtime in finished:
+            self._history_mtime = mtime
+            if on_done is not None:
+                on_done(error)
+            elif error:
+                messagebox.showerror("File Error", error)
+
+    def _on_close(self):
+        """Waits for pending history writes before closing the application."""
+        self._io_q.join()
+        self.root.destroy()
             
+
     def clear_history(self, history_window):
         """
         Clears all BMI history records and the history file after user confirmation.
@@ -206,16 +411,22 @@ class BMICalculatorApp:
             "Confirm Clear History", 
             "Are you sure you want to permanently delete ALL recorded history? This action cannot be undone."
         ):
-            self.history = []
-            try:
-                with open(HISTORY_FILE, 'w') as f:
-                    json.dump([], f)
-                
-                messagebox.showinfo("History Cleared", "All BMI history records have been successfully deleted.")
-                history_window.destroy()
+            cleared = len(self.history)
+            self._queue_write('clear', None, lambda error: self._on_history_cleared(history_window, cleared, error))
 
-            except IOError:
-                messagebox.showerror("File Error", "Could not clear BMI history file.")
+    def _on_history_cleared(self, history_window, cleared, error):
+        """Finishes clearing the history once the worker has truncated the file."""
+        if error:
+            messagebox.showerror("File Error", error)
+            return
+
+        # Entries saved after the clear was requested were written after the truncate
+        self.history = self.history[cleared:]
+        self._columns_stale = True
+
+        messagebox.showinfo("History Cleared", "All BMI history records have been successfully deleted.")
+        if history_window.winfo_exists():
+            history_window.destroy()
 
 
     # --- Input Validation and Focus Handlers ---
@@ -229,53 +440,24 @@ class BMICalculatorApp:
     
     def _validate_input(self, new_value):
         """Allows only digits and a single decimal point."""
-        if new_value == "":
-            return True
-        
-        try:
-            float(new_value)
-            if new_value.count('.') > 1:
-                return False
-            return True
-        except ValueError:
-            return False
+        return _FLOAT_RE.match(new_value) is not None
 
     def _validate_int(self, new_value):
         """Allows only digits for age."""
-        if new_value == "":
-            return True
-        try:
-            int(new_value)
-            return True
-        except ValueError:
-            return False
+        return _INT_RE.match(new_value) is not None
 
     # --- Animation (Light Red/Pink Theme) ---
     def _animate_background(self):
-        """Creates a subtle, floating bubble animation in the background canvas."""
-        # 1. Clear previous drawings
-        self.bg_canvas.delete("animation_elements")
-
-        # Define light red/pink colors for animation
-        bubble_fill = '#ffc0cb' # Pink
-        bubble_outline = '#ff9999' # Light Coral
-
-        # 2. Draw 5 floating bubbles
-        for i in range(5):
-            x = (i * WINDOW_WIDTH / 5) + (random.randint(10, 50) if i % 2 == 0 else -random.randint(10, 50))
+        """Moves the floating bubbles created in _setup_ui to their next position."""
+        # 1. Reposition each persistent bubble (no delete/re-create per frame)
+        for i, (bubble_id, x, radius) in enumerate(zip(self._bubble_ids, self._bubble_x, self._bubble_r)):
             y = (self.animation_y + i * 100 + WINDOW_HEIGHT) % (WINDOW_HEIGHT + 200) - 100
-            radius = 20 + (i % 3) * 5 
-
-            self.bg_canvas.create_oval(
-                x - radius, y - radius, x + radius, y + radius,
-                outline=bubble_outline, fill=bubble_fill, tags="animation_elements", 
-                width=2, stipple="gray50" 
-            )
+            self.bg_canvas.coords(bubble_id, x - radius, y - radius, x + radius, y + radius)
         
-        # 3. Increment Y position for movement (simulating upward flow)
+        # 2. Increment Y position for movement (simulating upward flow)
         self.animation_y = (self.animation_y + 1) % 200 
         
-        # 4. Schedule the next animation frame
+        # 3. Schedule the next animation frame
         self.root.after(ANIMATION_SPEED, self._animate_background)
 
     # --- UI Setup (Light Blue/Violet Buttons) ---
@@ -287,13 +469,30 @@ class BMICalculatorApp:
             WINDOW_WIDTH / 2, 25, 
             text="📏 BODY & HEALTH CALCULATOR", 
             fill=HEADER_FG, 
-            font=("Arial", 14, "bold")
+            font=self._fonts['title']
         )
 
         # --- Animated Background Canvas ---
         self.bg_canvas = tk.Canvas(self.root, bg=CANVAS_BG, highlightthickness=0)
         self.bg_canvas.pack(fill='both', expand=True)
 
+        # Define light red/pink colors for animation
+        bubble_fill = '#ffc0cb' # Pink
+        bubble_outline = '#ff9999' # Light Coral
+
+        # Create the 5 floating bubbles once; _animate_background only moves them
+        # Horizontal jitter is sampled once so bubbles float instead of shaking
+        self._bubble_jitter = [random.randint(10, 50) if i % 2 == 0 else -random.randint(10, 50) for i in range(5)]
+        self._bubble_x = [(i * WINDOW_WIDTH / 5) + self._bubble_jitter[i] for i in range(5)]
+        self._bubble_r = [20 + (i % 3) * 5 for i in range(5)]
+        self._bubble_ids = []
+        for i in range(5):
+            self._bubble_ids.append(self.bg_canvas.create_oval(
+                0, 0, 0, 0,
+                outline=bubble_outline, fill=bubble_fill, tags="animation_elements", 
+                width=2
+            ))
+
         # --- Main Content Frame ---
         main_content_frame = tk.Frame(self.bg_canvas, padx=20, pady=10, bg=MAIN_FRAME_BG, bd=5, relief=tk.RAISED)
         main_content_frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER, relwidth=0.9, relheight=0.95)
@@ -313,9 +512,9 @@ class BMICalculatorApp:
         ]
         
         for i, (label_text, var, vcmd) in enumerate(inputs):
-            tk.Label(input_frame, text=label_text, font=("Arial", 12), bg=MAIN_FRAME_BG, fg="#333").grid(row=i, column=0, sticky='w', padx=5, pady=5)
+            tk.Label(input_frame, text=label_text, font=self._fonts['label'], bg=MAIN_FRAME_BG, fg="#333").grid(row=i, column=0, sticky='w', padx=5, pady=5)
             
-            entry = tk.Entry(input_frame, textvariable=var, width=15, font=("Arial", 12), justify='center', bg=ENTRY_BG)
+            entry = tk.Entry(input_frame, textvariable=var, width=15, font=self._fonts['label'], justify='center', bg=ENTRY_BG)
             if vcmd:
                 entry.config(validate='key', validatecommand=(vcmd, '%P'))
             
@@ -326,22 +525,22 @@ class BMICalculatorApp:
                 entry.focus_set()
 
         # Gender Input (OptionMenu)
-        tk.Label(input_frame, text="Gender:", font=("Arial", 12), bg=MAIN_FRAME_BG, fg="#333").grid(row=4, column=0, sticky='w', padx=5, pady=5)
+        tk.Label(input_frame, text="Gender:", font=self._fonts['label'], bg=MAIN_FRAME_BG, fg="#333").grid(row=4, column=0, sticky='w', padx=5, pady=5)
         gender_options = ["Male", "Female"]
         self.gender_menu = tk.OptionMenu(input_frame, self.gender_var, *gender_options)
-        self.gender_menu.config(width=12, font=("Arial", 10), bg=ENTRY_BG, bd=1, relief=tk.FLAT)
+        self.gender_menu.config(width=12, font=self._fonts['body'], bg=ENTRY_BG, bd=1, relief=tk.FLAT)
         self.gender_menu.grid(row=4, column=1, sticky='e', padx=5, pady=5)
         
         # 3. Calculate Button (Light Blue)
         tk.Button(main_content_frame, text="Calculate All Metrics", command=self.calculate_bmi_gui,
-                  bg=BUTTON_COLOR, fg='white', font=("Arial", 12, "bold"), 
+                  bg=BUTTON_COLOR, fg='white', font=self._fonts['label_bold'], 
                   activebackground="#6495ed", activeforeground="white", # Deeper Blue on click
                   relief='raised', bd=3).pack(pady=(15, 10))
         
         # 4. Diet Plan Button (Violet)
         self.diet_plan_button = tk.Button(main_content_frame, text="Generate Diet & Calorie Goal", 
                                           command=self.open_diet_plan_window,
-                                          bg='#9370db', fg='white', font=("Arial", 10), # Medium Purple/Violet
+                                          bg='#9370db', fg='white', font=self._fonts['body'], # Medium Purple/Violet
                                           activebackground="#4b0082", activeforeground="white", # Indigo on click
                                           state=tk.DISABLED)
         self.diet_plan_button.pack(pady=(0, 10))
@@ -349,27 +548,27 @@ class BMICalculatorApp:
 
         # 5. History Button (Lighter Blue)
         tk.Button(main_content_frame, text="View History, Stats, & Trends", command=self.view_history,
-                  bg='#add8e6', fg='#333', font=("Arial", 10), # Light Blue
+                  bg='#add8e6', fg='#333', font=self._fonts['body'], # Light Blue
                   activebackground="#4682b4", activeforeground="white", # Steel Blue on click
                   ).pack(pady=(0, 20))
 
         # --- Results Display ---
         
         # BMR and Ideal Weight Results
-        self.bmr_label = tk.Label(main_content_frame, text="BMR: N/A kcal/day", font=("Arial", 11, "bold"), bg=MAIN_FRAME_BG, fg="#0056b3")
+        self.bmr_label = tk.Label(main_content_frame, text="BMR: N/A kcal/day", font=self._fonts['section'], bg=MAIN_FRAME_BG, fg="#0056b3")
         self.bmr_label.pack(pady=(0, 5))
         
-        self.ideal_weight_label = tk.Label(main_content_frame, text="Ideal Weight Range: N/A kg", font=("Arial", 11, "bold"), bg=MAIN_FRAME_BG, fg="#0056b3")
+        self.ideal_weight_label = tk.Label(main_content_frame, text="Ideal Weight Range: N/A kg", font=self._fonts['section'], bg=MAIN_FRAME_BG, fg="#0056b3")
         self.ideal_weight_label.pack(pady=(0, 10))
 
         # BMI Results
-        self.bmi_label = tk.Label(main_content_frame, text="Your BMI: N/A", font=("Arial", 16, "bold"), bg=MAIN_FRAME_BG, fg="#333")
+        self.bmi_label = tk.Label(main_content_frame, text="Your BMI: N/A", font=self._fonts['heading'], bg=MAIN_FRAME_BG, fg="#333")
         self.bmi_label.pack()
         
-        self.category_label = tk.Label(main_content_frame, text="Category: ", font=("Arial", 14), bg=MAIN_FRAME_BG)
+        self.category_label = tk.Label(main_content_frame, text="Category: ", font=self._fonts['category'], bg=MAIN_FRAME_BG)
         self.category_label.pack(pady=(5, 5))
         
-        self.advice_label = tk.Label(main_content_frame, text="", font=("Arial", 10, "italic"), bg=MAIN_FRAME_BG, wraplength=350, justify='center')
+        self.advice_label = tk.Label(main_content_frame, text="", font=self._fonts['body_italic'], bg=MAIN_FRAME_BG, wraplength=350, justify='center')
         self.advice_label.pack()
 
 
@@ -391,22 +590,27 @@ class BMICalculatorApp:
         diet_window.config(bg=MAIN_FRAME_BG)
         diet_window.resizable(False, False)
         
-        # --- Load and display workout image ---
-        try:
-            # Load the image using Pillow
-            img = Image.open("workout.png")
-            img = img.resize((120, 120), Image.Resampling.LANCZOS)
-            
-            # Keep a reference to avoid garbage collection
-            self.workout_image = ImageTk.PhotoImage(img)
-            
+        # --- Load and display workout image (loaded and resized only once) ---
+        if self.workout_image is None and not self._workout_missing:
+            try:
+                from PIL import Image, ImageTk
+
+                # Load the image using Pillow
+                img = Image.open("workout.png")
+                img = img.resize((120, 120), Image.Resampling.LANCZOS)
+                
+                # Keep a reference to avoid garbage collection
+                self.workout_image = ImageTk.PhotoImage(img)
+
+            except FileNotFoundError:
+                # If image is not found, just print a message to console and continue
+                print("workout.png not found. Skipping image display.")
+                self._workout_missing = True
+
+        if self.workout_image is not None:
             img_label = tk.Label(diet_window, image=self.workout_image, bg=MAIN_FRAME_BG)
             img_label.place(relx=0.98, rely=0.98, anchor='se')
 
-        except FileNotFoundError:
-            # If image is not found, just print a message to console and continue
-            print("workout.png not found. Skipping image display.")
-
         # Center the new window over the main window
         x = self.root.winfo_x() + (self.root.winfo_width() - 450) // 2
         y = self.root.winfo_y() + (self.root.winfo_height() - 450) // 2
@@ -414,40 +618,40 @@ class BMICalculatorApp:
 
         # Title
         tk.Label(diet_window, text=plan_data['title'], 
-                 font=("Arial", 14, "bold"), bg=HEADER_BG, fg=HEADER_FG).pack(fill='x', pady=(0, 10))
+                 font=self._fonts['title'], bg=HEADER_BG, fg=HEADER_FG).pack(fill='x', pady=(0, 10))
 
         content_frame = tk.Frame(diet_window, bg=MAIN_FRAME_BG, padx=15, pady=10)
         content_frame.pack(fill='both', expand=True)
 
         # Calorie Goal
         tk.Label(content_frame, text="🔥 Daily Calorie Goal (TDEE Estimate)", 
-                 font=("Arial", 11, "bold"), bg=MAIN_FRAME_BG, fg='#0056b3').pack(anchor='w', pady=(5, 0))
+                 font=self._fonts['section'], bg=MAIN_FRAME_BG, fg='#0056b3').pack(anchor='w', pady=(5, 0))
         tk.Label(content_frame, text=f"{plan_data['goal_kcal']:.0f} kcal", 
-                 font=("Arial", 24, "bold"), bg=MAIN_FRAME_BG, fg='#dc3545').pack(pady=(0, 10))
+                 font=self._fonts['display'], bg=MAIN_FRAME_BG, fg='#dc3545').pack(pady=(0, 10))
         
         # Focus
-        tk.Label(content_frame, text="🎯 Plan Focus:", font=("Arial", 11, "bold"), 
+        tk.Label(content_frame, text="🎯 Plan Focus:", font=self._fonts['section'], 
                  bg=MAIN_FRAME_BG, fg='#28a745').pack(anchor='w', pady=(5, 0))
-        tk.Label(content_frame, text=plan_data['focus'], font=("Arial", 10), 
+        tk.Label(content_frame, text=plan_data['focus'], font=self._fonts['body'], 
                  bg=MAIN_FRAME_BG, wraplength=400, justify='left').pack(anchor='w')
 
         # Macros
-        tk.Label(content_frame, text="📊 Suggested Macro Split:", font=("Arial", 11, "bold"), 
+        tk.Label(content_frame, text="📊 Suggested Macro Split:", font=self._fonts['section'], 
                  bg=MAIN_FRAME_BG, fg='#0056b3').pack(anchor='w', pady=(10, 0))
-        tk.Label(content_frame, text=plan_data['macros'], font=("Arial", 10, 'italic'), 
+        tk.Label(content_frame, text=plan_data['macros'], font=self._fonts['body_italic'], 
                  bg=MAIN_FRAME_BG).pack(anchor='w')
 
         # Suggestions
-        tk.Label(content_frame, text="🥦 Meal Strategy:", font=("Arial", 11, "bold"), 
+        tk.Label(content_frame, text="🥦 Meal Strategy:", font=self._fonts['section'], 
                  bg=MAIN_FRAME_BG, fg='#28a745').pack(anchor='w', pady=(10, 0))
         
         # Display suggestions as list
-        for i, suggestion in enumerate(plan_data['suggestions']):
-             tk.Label(content_frame, text=f"• {suggestion}", font=("Arial", 9), 
+        for suggestion in plan_data['suggestions']:
+             tk.Label(content_frame, text=f"• {suggestion}", font=self._fonts['small'], 
                       bg=MAIN_FRAME_BG, wraplength=400, justify='left').pack(anchor='w')
         
         tk.Label(diet_window, text="*Consult a healthcare professional before starting any new diet.", 
-                 font=("Arial", 8, "italic"), bg=MAIN_FRAME_BG, fg='gray').pack(pady=10)
+                 font=self._fonts['footnote'], bg=MAIN_FRAME_BG, fg='gray').pack(pady=10)
 
 
     # --- Calculation Handlers ---
@@ -479,13 +683,13 @@ class BMICalculatorApp:
                  messagebox.showwarning("Input Error", "Please enter positive values for weight and height.")
                  return
 
-            # --- 1. Perform Calculation ---
-            bmi_value = calculate_bmi(weight_kg, height_cm)
-            category, color, advice = get_bmi_classification(bmi_value)
+            # --- 1. Calculate BMI, BMR and Ideal Weight together ---
+            bmi_value, bmr_value, (low_ideal, high_ideal) = compute_all_metrics(
+                weight_kg, height_cm, age_years, gender_str
+            )
             
-            # --- 2. Calculate BMR and Ideal Weight (New Metrics) ---
-            bmr_value = calculate_bmr(weight_kg, height_cm, age_years, gender_str)
-            low_ideal, high_ideal = calculate_ideal_weight_range(height_cm)
+            # --- 2. Classify the BMI ---
+            category, color, advice = get_bmi_classification(bmi_value)
 
             # --- 3. Record and save the new history entry ---
             new_entry = {
@@ -526,9 +730,30 @@ class BMICalculatorApp:
             messagebox.showerror("An Error Occurred", f"An unexpected error happened: {e}")
 
     # --- Dashboard Helper Methods ---
+    def _rebuild_columns(self):
+        """
+        Copies the history entries into parallel NumPy columns used by the
+        statistics, trend plot and table, so they don't walk the entry dicts.
+        """
+        import numpy as np
+
+        count = len(self.history)
+        self._bmi_col = np.fromiter((e['bmi'] for e in self.history), dtype=np.float64, count=count)
+        self._weight_col = np.fromiter((e['weight_kg'] for e in self.history), dtype=np.float64, count=count)
+        self._height_col = np.fromiter((e['height_cm'] for e in self.history), dtype=np.float64, count=count)
+        self._date_col = np.array([e['_date_obj'] for e in self.history], dtype=object)
+        self._day_col = np.array([e['date'][:10] for e in self.history], dtype=object)
+        self._name_col = np.array([e.get('name', 'N/A') for e in self.history], dtype=object)
+        # Categories are classified from the BMI column in one pass, so every row maps
+        # to a color tag even for entries saved without (or with an outdated) category
+        category_names = np.array([category for category, _, _ in _BMI_INFO], dtype=object)
+        self._cat_col = category_names[classify_batch(self._bmi_col)]
+        self._columns_stale = False
+
     def _calculate_statistics(self):
-        """Calculates key statistics from the BMI history."""
-        if not self.history:
+        """Calculates key statistics from the BMI history columns."""
+        bmis = self._bmi_col
+        if not bmis.size:
             return {
                 'count': 0,
                 'avg_bmi': 'N/A',
@@ -536,20 +761,18 @@ class BMICalculatorApp:
                 'max_bmi': 'N/A',
             }
         
-        bmis = [entry['bmi'] for entry in self.history]
-        
         return {
-            'count': len(bmis),
-            'avg_bmi': f"{sum(bmis) / len(bmis):.2f}",
-            'min_bmi': f"{min(bmis):.2f}",
-            'max_bmi': f"{max(bmis):.2f}",
+            'count': bmis.size,
+            'avg_bmi': f"{bmis.mean():.2f}",
+            'min_bmi': f"{bmis.min():.2f}",
+            'max_bmi': f"{bmis.max():.2f}",
         }
 
     def _display_statistics(self, frame):
         """Creates the statistics summary section."""
         stats = self._calculate_statistics()
         
-        tk.Label(frame, text="Summary Statistics", font=("Arial", 12, "bold"), 
+        tk.Label(frame, text="Summary Statistics", font=self._fonts['label_bold'], 
                  bg='#e0e0e0', anchor='w').pack(fill='x', pady=(0, 5))
 
         stats_frame = tk.Frame(frame, bg='#e0e0e0', padx=10, pady=5)
@@ -563,53 +786,73 @@ class BMICalculatorApp:
         ]
 
         for i, (label, value) in enumerate(data):
-            tk.Label(stats_frame, text=label, bg='#e0e0e0', font=("Arial", 10)).grid(row=i, column=0, sticky='w')
-            tk.Label(stats_frame, text=value, bg='#e0e0e0', font=("Arial", 10, 'bold')).grid(row=i, column=1, sticky='e', padx=(50, 0))
+            tk.Label(stats_frame, text=label, bg='#e0e0e0', font=self._fonts['body']).grid(row=i, column=0, sticky='w')
+            tk.Label(stats_frame, text=value, bg='#e0e0e0', font=self._fonts['body_bold']).grid(row=i, column=1, sticky='e', padx=(50, 0))
             stats_frame.grid_columnconfigure(1, weight=1) 
 
     def _generate_bmi_plot(self, frame):
         """Generates a matplotlib line graph of BMI trend over time."""
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.collections import QuadMesh
+        from matplotlib.colors import ListedColormap
+        from matplotlib.figure import Figure
+        import numpy as np
         
         # Check for history entries
         if len(self.history) < 2:
-            tk.Label(frame, text="Need at least 2 records to show a trend graph.", font=("Arial", 10, "italic"), bg=MAIN_FRAME_BG).pack(expand=True, fill='both', pady=20)
+            tk.Label(frame, text="Need at least 2 records to show a trend graph.", font=self._fonts['body_italic'], bg=MAIN_FRAME_BG).pack(expand=True, fill='both', pady=20)
             return
 
         # Prepare data
-        dates = [datetime.strptime(entry['date'].split(" ")[0], "%Y-%m-%d") for entry in self.history]
-        bmis = [entry['bmi'] for entry in self.history]
+        dates = self._date_col
+        bmis = self._bmi_col
 
-        # 1. Create the Matplotlib Figure
-        fig = Figure(figsize=(4, 2.5), dpi=100, facecolor=MAIN_FRAME_BG)
-        ax = fig.add_subplot(111)
-        
-        # 2. Plot the data
-        ax.plot(dates, bmis, marker='o', linestyle='-', color='#0056b3', linewidth=2)
-        
-        # 3. Add BMI Classification Zones (Shading)
         # Assuming BMI data is generally under 40 for a clean plot
-        max_y = max(max(bmis) + 5, 35) # Ensure the top is visible even if max BMI is low
-        
-        ax.axhspan(0, 18.5, facecolor=DARK_PINK, alpha=0.15, label='Underweight')
-        ax.axhspan(18.5, 24.9, facecolor='#28a745', alpha=0.15, label='Normal')
-        ax.axhspan(25.0, 29.9, facecolor='#fd7e14', alpha=0.15, label='Overweight')
-        ax.axhspan(30.0, max_y, facecolor='#dc3545', alpha=0.15, label='Obese')
-        
-        # 4. Formatting
-        ax.set_title('BMI Trend Over Time', fontsize=12, color='#333')
-        ax.set_xlabel('Date', fontsize=10, color='#555')
-        ax.set_ylabel('BMI Value', fontsize=10, color='#555')
+        max_y = max(bmis.max() + 5, 35) # Ensure the top is visible even if max BMI is low
+
+        if self._bmi_plot is None:
+            # 1. Create the Matplotlib Figure (only on the first dashboard open)
+            fig = Figure(figsize=(4, 2.5), dpi=100, facecolor=MAIN_FRAME_BG)
+            ax = fig.add_subplot(111)
+            
+            # 2. Plot the data
+            line, = ax.plot(dates, bmis, marker='o', linestyle='-', color='#0056b3', linewidth=2)
+            
+            # 3. Add BMI Classification Zones (Shading) as a single mesh artist.
+            # It spans the full axes width and extends well past any realistic BMI,
+            # so it never needs redrawing; the y-limits clip it to the visible range.
+            # Added with autolim=False: its x runs in axes fractions (0..1), which must
+            # not leak into the date axis' data limits.
+            zone_x, zone_y = np.meshgrid([0, 1], (0,) + _BMI_CUTS + (1000,))
+            zones = QuadMesh(np.dstack((zone_x, zone_y)),
+                             array=np.arange(len(_BMI_INFO)).reshape(-1, 1),
+                             cmap=ListedColormap([color for _, color, _ in _BMI_INFO]),
+                             alpha=0.15, zorder=0, transform=ax.get_yaxis_transform())
+            ax.add_collection(zones, autolim=False)
+            
+            # 4. Formatting
+            ax.set_title('BMI Trend Over Time', fontsize=12, color='#333')
+            ax.set_xlabel('Date', fontsize=10, color='#555')
+            ax.set_ylabel('BMI Value', fontsize=10, color='#555')
+            ax.grid(True, linestyle='--', alpha=0.6)
+
+            self._bmi_plot = (fig, ax, line)
+        else:
+            # Reuse the cached figure and only swap in the new data
+            fig, ax, line = self._bmi_plot
+            line.set_data(dates, bmis)
+            ax.relim()
+            ax.autoscale_view(scaley=False)
         
         # Format the date ticks
         fig.autofmt_xdate(rotation=45, ha='right')
         
         # Set y-axis limits dynamically
-        min_bmi = min(bmis)
+        min_bmi = bmis.min()
         ax.set_ylim(max(0, min_bmi - 2), max_y) 
-
-        ax.grid(True, linestyle='--', alpha=0.6)
         
         # 5. Embed the plot into the Tkinter frame
+        # (Tk widgets can't move between windows, so only the canvas is rebuilt per open)
         canvas = FigureCanvasTkAgg(fig, master=frame)
         canvas_widget = canvas.get_tk_widget()
         canvas_widget.pack(fill='both', expand=True)
@@ -618,7 +861,12 @@ class BMICalculatorApp:
 
     def view_history(self):
         """Opens a new window to display the recorded BMI history, stats, and trend chart."""
-        self.history = self._load_history() 
+        # self.history is kept in sync by _save_history; only reload if the file changed externally.
+        # While our own writes are pending the mtime is expected to move, so skip the check.
+        if not self._pending_writes and self._history_file_mtime() > self._history_mtime:
+            self.history = self._load_history()
+        if self._columns_stale:
+            self._rebuild_columns()
         
         history_window = tk.Toplevel(self.root)
         history_window.title("BMI History & Trends")
@@ -628,7 +876,7 @@ class BMICalculatorApp:
 
         tk.Label(history_window, 
                  text="📊 BMI TRACKING DASHBOARD", 
-                 font=("Arial", 16, "bold"), 
+                 font=self._fonts['heading'], 
                  bg=HEADER_BG, fg=HEADER_FG).pack(fill='x', pady=5)
         
         if not self.history:
@@ -637,7 +885,7 @@ class BMICalculatorApp:
             
             tk.Button(history_window, text="🚨 Clear All History Records 🚨", 
                       command=lambda: self.clear_history(history_window),
-                      bg='#dc3545', fg='white', font=("Arial", 10, "bold")).pack(pady=10)
+                      bg='#dc3545', fg='white', font=self._fonts['body_bold']).pack(pady=10)
             return
 
         
@@ -656,57 +904,48 @@ class BMICalculatorApp:
         self._generate_bmi_plot(plot_frame)
         
         
-        tk.Label(history_window, text="Full Measurement History", font=("Arial", 12, "bold"), 
+        tk.Label(history_window, text="Full Measurement History", font=self._fonts['label_bold'], 
                  bg='#e0e0e0', anchor='w').pack(fill='x', padx=10, pady=(10, 5))
 
         
-        canvas_history = tk.Canvas(history_window, bg=MAIN_FRAME_BG, highlightthickness=0)
-        scrollbar = tk.Scrollbar(history_window, orient="vertical", command=canvas_history.yview)
-        scrollable_frame = tk.Frame(canvas_history, bg=MAIN_FRAME_BG)
+        table_frame = tk.Frame(history_window, bg=MAIN_FRAME_BG)
+        table_frame.pack(fill="both", expand=True, padx=10, pady=5)
 
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas_history.configure(
-                scrollregion=canvas_history.bbox("all")
-            )
-        )
+        # --- Create Table Headers ---
+        headers = ["Date", "Name", "Weight (kg)", "Height (cm)", "BMI", "Category"]
+        tree = ttk.Treeview(table_frame, columns=headers, show='headings', height=15)
+        for header in headers:
+            tree.heading(header, text=header)
+            tree.column(header, width=100, anchor='center')
 
-        canvas_history.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas_history.configure(yscrollcommand=scrollbar.set)
+        # One tag per category carries the row color
+        for category, color, _ in _BMI_INFO:
+            tree.tag_configure(category, foreground=color)
+
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
         
         scrollbar.pack(side="right", fill="y")
-        canvas_history.pack(side="left", fill="both", expand=True, padx=10, pady=5)
-
-        # --- Create Table Headers ---
-        headers = ["Date", "Name", "Weight (kg)", "Height (cm)", "BMI", "Category"]
-        for col, header in enumerate(headers):
-            tk.Label(scrollable_frame, text=header, 
-                     font=("Arial", 10, "bold"), 
-                     bg="#b3d4ff", width=12, relief='raised', borderwidth=1).grid(row=0, column=col, sticky="nsew")
+        tree.pack(side="left", fill="both", expand=True)
 
         # --- Populate Table Rows ---
-        for row_index, entry in enumerate(self.history):
-            _, color, _ = get_bmi_classification(entry['bmi'])
-            
-            data = [
-                entry['date'].split(" ")[0],
-                entry.get('name', 'N/A'),
-                f"{entry['weight_kg']:.1f}",
-                f"{entry['height_cm']:.0f}",
-                f"{entry['bmi']:.2f}",
-                entry['category']
-            ]
-            
-            for col, item in enumerate(data):
-                tk.Label(scrollable_frame, text=item, 
-                         font=("Arial", 9), 
-                         bg=MAIN_FRAME_BG, fg=color, 
-                         width=12, relief='flat', borderwidth=0).grid(row=row_index + 1, column=col, sticky="nsew", pady=2)
+        for day, name, weight, height, bmi, category in zip(
+            self._day_col, self._name_col, self._weight_col.tolist(),
+            self._height_col.tolist(), self._bmi_col.tolist(), self._cat_col
+        ):
+            tree.insert('', 'end', values=(
+                day,
+                name,
+                f"{weight:.1f}",
+                f"{height:.0f}",
+                f"{bmi:.2f}",
+                category
+            ), tags=(category,))
                 
         # --- Clear History Button (Alert/Destructive Action color kept red) ---
         tk.Button(history_window, text="🚨 Clear All History Records 🚨", 
                   command=lambda: self.clear_history(history_window),
-                  bg='#dc3545', fg='white', font=("Arial", 10, "bold"), 
+                  bg='#dc3545', fg='white', font=self._fonts['body_bold'], 
                   activebackground="#c82333", activeforeground="white").pack(pady=10)
 
 